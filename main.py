@@ -1,37 +1,145 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 import os
 import time
 import hmac
 import logging
 from hashlib import sha256
-import requests  # For API calls
+import httpx  # For API calls
 
-app = FastAPI()
+XI_API_KEY = os.getenv("XI_API_KEY", "")
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client per worker so outbound ElevenLabs calls reuse
+    # keep-alive connections and never block the event loop
+    async with httpx.AsyncClient(
+        base_url="https://api.elevenlabs.io",
+        headers={"xi-api-key": XI_API_KEY},
+        limits=httpx.Limits(max_keepalive_connections=32),
+        timeout=5.0,
+    ) as client:
+        app.state.http = client
+        yield
+
+app = FastAPI(lifespan=lifespan)
+# Compress larger JSON responses; tiny bodies are not worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
+# Set up logging (set LOG_LEVEL=WARNING in production to drop per-request INFO lines)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
-# ElevenLabs static egress IPs for whitelisting (by region)
-ALLOWED_IPS = [
+# ElevenLabs static egress IPs for whitelisting (by region).
+# A frozenset keeps membership checks O(1).
+ALLOWED_IPS = frozenset({
     "34.67.146.145",  # US
     "34.59.11.47",    # US
     "35.204.38.71",   # EU
     "34.147.113.54",  # EU
     "35.185.187.110", # Asia
     "35.247.157.189"  # Asia
-]
+})
+
+# Webhook bodies are small; anything larger is rejected
+MAX_WEBHOOK_BODY = 1024 * 1024
+
+class WebhookGuardMiddleware:
+    """Screen /webhook requests by client IP and body size before they reach the app."""
+
+    def __init__(self, app, allowed_ips=ALLOWED_IPS, paths=frozenset({"/webhook"}), max_body_size=MAX_WEBHOOK_BODY):
+        self.app = app
+        self.allowed_ips = allowed_ips
+        self.paths = paths
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        if client is None or client[0] not in self.allowed_ips:
+            logger.warning("Rejected webhook from %s", client and client[0])
+            response = JSONResponse({"detail": "Forbidden"}, status_code=403)
+            await response(scope, receive, send)
+            return
+
+        content_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    response = JSONResponse({"detail": "Invalid Content-Length"}, status_code=400)
+                    await response(scope, receive, send)
+                    return
+                break
 
+        if content_length is not None:
+            if content_length > self.max_body_size:
+                response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+                await response(scope, receive, send)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        # Chunked uploads carry no Content-Length, so buffer up to the cap here
+        # (whether or not the handler reads the body) and replay it downstream
+        chunks = []
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if received > self.max_body_size:
+                response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+                await response(scope, receive, send)
+                return
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay_receive, send)
+
+# Added last so it runs first, ahead of compression and routing
+app.add_middleware(WebhookGuardMiddleware)
+
+# Return types let FastAPI serialize straight to JSON bytes via pydantic-core
 @app.get("/health")
-async def health():
+async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 @app.post("/webhook")
-async def webhook():
+async def webhook() -> dict[str, dict[str, str]]:
     return {"client": {"name": "Ara"}}
 
 @app.post("/sms")
-async def sms(request: Request):
+async def sms(request: Request) -> str:
     form = await request.form()
-    logger.info(f"SMS received: {dict(form)}")
+    logger.info("SMS received: %s", dict(form))
     return "OK"
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        access_log=False,
+    )
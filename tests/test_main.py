@@ -0,0 +1,105 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+import main
+
+ELEVENLABS_IP = "34.67.146.145"
+PROXY_IP = "10.0.0.1"
+
+
+def test_webhook_accepts_allowlisted_ip():
+    with TestClient(main.app, client=(ELEVENLABS_IP, 1234)) as client:
+        response = client.post("/webhook")
+    assert response.status_code == 200
+    assert response.json() == {"client": {"name": "Ara"}}
+
+
+def test_webhook_rejects_unknown_ip():
+    with TestClient(main.app, client=("203.0.113.9", 1234)) as client:
+        response = client.post("/webhook")
+        assert response.status_code == 403
+        # Only /webhook is guarded
+        assert client.get("/health").status_code == 200
+
+
+def test_webhook_rejects_spoofed_forwarded_for_behind_trusted_proxy():
+    # The client prepends an allowlisted IP; the proxy appends the real one
+    app = ProxyHeadersMiddleware(main.app, trusted_hosts=PROXY_IP)
+    with TestClient(app, client=(PROXY_IP, 1234)) as client:
+        response = client.post(
+            "/webhook", headers={"X-Forwarded-For": f"{ELEVENLABS_IP}, 203.0.113.9"}
+        )
+    assert response.status_code == 403
+
+
+def test_webhook_accepts_allowlisted_ip_behind_trusted_proxy():
+    app = ProxyHeadersMiddleware(main.app, trusted_hosts=PROXY_IP)
+    with TestClient(app, client=(PROXY_IP, 1234)) as client:
+        response = client.post(
+            "/webhook", headers={"X-Forwarded-For": f"203.0.113.9, {ELEVENLABS_IP}"}
+        )
+    assert response.status_code == 200
+
+
+def _chunks(total, size=256 * 1024):
+    while total > 0:
+        yield b"x" * min(size, total)
+        total -= size
+
+
+def test_webhook_rejects_oversized_content_length():
+    with TestClient(main.app, client=(ELEVENLABS_IP, 1234)) as client:
+        response = client.post("/webhook", content=b"x" * (main.MAX_WEBHOOK_BODY + 1))
+    assert response.status_code == 413
+
+
+def test_webhook_rejects_oversized_chunked_upload():
+    with TestClient(main.app, client=(ELEVENLABS_IP, 1234)) as client:
+        response = client.post("/webhook", content=_chunks(main.MAX_WEBHOOK_BODY + 1))
+    assert response.status_code == 413
+
+
+def test_webhook_accepts_small_chunked_upload():
+    with TestClient(main.app, client=(ELEVENLABS_IP, 1234)) as client:
+        response = client.post("/webhook", content=_chunks(1024))
+    assert response.status_code == 200
+
+
+def test_guard_replays_buffered_chunked_body():
+    async def echo_length(scope, receive, send):
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": str(len(body)).encode()})
+
+    # No context manager: the bare echo app does not speak the lifespan protocol
+    client = TestClient(main.WebhookGuardMiddleware(echo_length), client=(ELEVENLABS_IP, 1234))
+    response = client.post("/webhook", content=_chunks(600 * 1024))
+    assert response.text == str(600 * 1024)
+
+
+def test_webhook_rejects_malformed_content_length():
+    # Called directly: HTTP clients refuse to send a non-numeric Content-Length
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/webhook",
+        "headers": [(b"content-length", b"abc")],
+        "client": (ELEVENLABS_IP, 1234),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(main.WebhookGuardMiddleware(main.app)(scope, receive, send))
+    assert sent[0]["status"] == 400